@@ -6,6 +6,7 @@ from kui.asgi import Kui
 from loguru import logger
 
 from .ai_api.gemini import initial_gemini_config
+from .journal import Journal
 from .routes import routes
 from .settings import settings
 
@@ -27,6 +28,28 @@ async def initial_cache(app: Kui) -> None:
     app.state.picture_cache = {}
     app.state.pending_queue = {}
     app.state.pending_queue_count = {}
+    # Replayed traffic must not touch the state of real users
+    app.state.replay_picture_cache = {}
+    app.state.replay_pending_queue = {}
+    app.state.replay_pending_queue_count = {}
+
+
+@app.on_startup
+async def initial_journal(app: Kui) -> None:
+    if not settings.journal_path:
+        app.state.journal = None
+        return
+    journal = Journal(
+        settings.journal_path, max_queue_size=settings.journal_max_queue_size
+    )
+    journal.start()
+    app.state.journal = journal
+
+
+@app.on_shutdown
+async def close_journal(app: Kui) -> None:
+    if app.state.journal is not None:
+        await asyncio.to_thread(app.state.journal.close)
 
 
 @app.on_startup
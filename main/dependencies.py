@@ -3,19 +3,35 @@ import time
 
 from kui.asgi import request
 
+from .journal import REPLAY_HEADER, Journal
+
 
 def get_picture_cache() -> dict[str, list[str]]:
+    if is_replay_request():
+        return request.app.state.replay_picture_cache
     return request.app.state.picture_cache
 
 
 def get_pending_queue() -> dict[str, asyncio.Task[str]]:
+    if is_replay_request():
+        return request.app.state.replay_pending_queue
     return request.app.state.pending_queue
 
 
 def get_pending_queue_count() -> dict[str, int]:
+    if is_replay_request():
+        return request.app.state.replay_pending_queue_count
     return request.app.state.pending_queue_count
 
 
+def get_journal() -> Journal | None:
+    return request.app.state.journal
+
+
+def is_replay_request() -> bool:
+    return request.headers.get(REPLAY_HEADER) == "1"
+
+
 async def get_access_token() -> str:
     if request.app.state.access_token_expired_at >= time.time():
         await request.app.state.refresh_token()
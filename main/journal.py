@@ -0,0 +1,172 @@
+import queue
+import sqlite3
+import threading
+import time
+from typing import Literal, NamedTuple
+
+from loguru import logger
+
+# Set by `python -m main.replay`, replayed traffic is journaled with `replay = 1`
+REPLAY_HEADER = "X-Journal-Replay"
+
+DROP_LOG_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    msg_id TEXT NOT NULL,
+    msg_type TEXT NOT NULL,
+    request TEXT NOT NULL,
+    response TEXT NOT NULL,
+    latency REAL NOT NULL,
+    error TEXT,
+    replay INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class JournalEntry(NamedTuple):
+    created_at: float
+    # message: raw inbound XML and the reply returned by `WeChat.post`
+    # generate: prompt text and the reply content of `WeChat.generate_content`
+    kind: Literal["message", "generate"]
+    user_id: str
+    msg_id: str
+    msg_type: str
+    request: str
+    response: str
+    latency: float
+    error: str | None
+    replay: bool
+
+
+class Journal:
+    """
+    Append-only message/reply journal.
+
+    `record` only enqueues the entry, a dedicated thread drains the queue and
+    writes to SQLite in batches. When the queue is full, entries are dropped
+    instead of blocking the request.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._dropped_logged_at = 0.0
+        self._connection: sqlite3.Connection | None = None
+        self._queue: queue.Queue[JournalEntry | None] = queue.Queue(max_queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="journal-writer", daemon=True
+        )
+
+    def start(self) -> None:
+        """
+        Open the database in the caller thread, so that startup fails loudly.
+        """
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+        except BaseException:
+            connection.close()
+            raise
+        self._connection = connection
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.dropped:
+            logger.warning(f"Journal dropped {self.dropped} entries")
+
+    def record(
+        self,
+        kind: Literal["message", "generate"],
+        *,
+        user_id: str,
+        msg_id: str,
+        msg_type: str,
+        request: str,
+        response: str,
+        latency: float,
+        error: str | None = None,
+        replay: bool = False,
+    ) -> None:
+        if not self._thread.is_alive():
+            return
+        entry = JournalEntry(
+            time.time(),
+            kind,
+            user_id,
+            msg_id,
+            msg_type,
+            request,
+            response,
+            latency,
+            error,
+            replay,
+        )
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._dropped_logged_at >= DROP_LOG_INTERVAL:
+                self._dropped_logged_at = now
+                logger.warning(
+                    f"Journal queue is full, {self.dropped} entries dropped so far"
+                )
+
+    def _run(self) -> None:
+        connection = self._connection
+        assert connection is not None, "Journal.start() opens the connection"
+        try:
+            stopping = False
+            while not stopping:
+                entry = self._queue.get()
+                batch: list[JournalEntry] = []
+                while True:
+                    if entry is None:
+                        stopping = True
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        entry = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._write(connection, batch)
+        except BaseException as error:
+            logger.exception(f"Journal writer stopped: {error}")
+        finally:
+            connection.close()
+
+    def _write(
+        self, connection: sqlite3.Connection, batch: list[JournalEntry]
+    ) -> None:
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO journal"
+                    " (created_at, kind, user_id, msg_id, msg_type, request, response, latency, error, replay)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+        except sqlite3.Error as error:
+            logger.exception(f"Journal write {len(batch)} entries failed: {error}")
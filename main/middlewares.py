@@ -2,10 +2,10 @@ import hashlib
 import hmac
 from typing import Annotated, Any
 
-from cool import F
 from kui.asgi import Header, HTTPException, PlainTextResponse, Query, request
 
 from .settings import settings
+from .utils import wechat_signature
 
 
 def validate_wechat_signature(endpoint):
@@ -18,9 +18,7 @@ def validate_wechat_signature(endpoint):
         timestamp: Annotated[str, Query(...)],
         nonce: Annotated[str, Query(...)],
     ) -> Annotated[Any, PlainTextResponse[400]]:
-        string = [settings.wechat_token, timestamp, nonce] | F(sorted) | F("".join)
-        sha1 = string.encode("utf-8") | F(lambda x: hashlib.sha1(x).hexdigest())
-        if sha1 != signature:
+        if wechat_signature(settings.wechat_token, timestamp, nonce) != signature:
             raise HTTPException(400, content="Invalid signature")
         return await endpoint()
 
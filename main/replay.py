@@ -0,0 +1,144 @@
+"""
+Replay journaled WeChat messages against a local instance.
+
+    python -m main.replay --url http://127.0.0.1:6576/wechat journal.sqlite3
+"""
+
+import argparse
+import asyncio
+import secrets
+import sqlite3
+import time
+
+import httpx
+
+from .journal import REPLAY_HEADER
+from .utils import wechat_signature
+
+# Events are excluded by default, scan callbacks POST to third-party URLs
+DEFAULT_MSG_TYPES = ("text", "voice", "image")
+
+
+def load_messages(
+    path: str, *, msg_types: list[str], since: float, limit: int | None
+) -> list[tuple[int, str, float]]:
+    """
+    Load real traffic only, traffic journaled by earlier replays is skipped.
+    WeChat retries a message with the same MsgId, only the first is loaded.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        placeholders = ", ".join("?" * len(msg_types))
+        return connection.execute(
+            "SELECT id, request, latency FROM journal"
+            " WHERE kind = 'message' AND replay = 0"
+            f" AND msg_type IN ({placeholders}) AND created_at >= ?"
+            " AND (msg_id = '' OR id IN ("
+            "SELECT MIN(id) FROM journal"
+            " WHERE kind = 'message' AND replay = 0 AND msg_id != ''"
+            " GROUP BY user_id, msg_id"
+            "))"
+            " ORDER BY id LIMIT ?",
+            (*msg_types, since, -1 if limit is None else limit),
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+async def replay(
+    messages: list[tuple[int, str, float]],
+    *,
+    url: str,
+    token: str,
+    concurrency: int,
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async def send(client: httpx.AsyncClient, id: int, body: str, latency: float):
+        nonlocal failures
+        timestamp = str(int(time.time()))
+        nonce = secrets.token_hex(8)
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                resp = await client.post(
+                    url,
+                    params={
+                        "signature": wechat_signature(token, timestamp, nonce),
+                        "timestamp": timestamp,
+                        "nonce": nonce,
+                    },
+                    headers={REPLAY_HEADER: "1"},
+                    content=body.encode("utf-8"),
+                )
+            except httpx.HTTPError as error:
+                failures += 1
+                print(f"#{id} error: {error!r}")
+                return
+            elapsed = time.perf_counter() - start_time
+        latencies.append(elapsed)
+        if not resp.is_success:
+            failures += 1
+        print(
+            f"#{id} {resp.status_code} {elapsed * 1000:.1f}ms"
+            f" (journaled {latency * 1000:.1f}ms)"
+        )
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        await asyncio.gather(
+            *(send(client, id, body, latency) for id, body, latency in messages)
+        )
+
+    if latencies:
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(
+            f"Replayed {len(messages)} messages, {failures} failed,"
+            f" p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms"
+        )
+    else:
+        print(f"Replayed {len(messages)} messages, {failures} failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("journal", help="path of the journal SQLite database")
+    parser.add_argument("--url", default="http://127.0.0.1:6576/wechat")
+    parser.add_argument(
+        "--token", default=None, help="WeChat token, defaults to WECHAT_TOKEN"
+    )
+    parser.add_argument(
+        "--since", type=float, default=0.0, help="unix timestamp to start from"
+    )
+    parser.add_argument(
+        "--msg-type",
+        action="append",
+        help="message types to replay, defaults to text, voice and image;"
+        " replaying event calls the journaled scan callback URLs",
+    )
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    token = args.token
+    if token is None:
+        from .settings import settings
+
+        token = settings.wechat_token
+
+    messages = load_messages(
+        args.journal,
+        msg_types=args.msg_type or list(DEFAULT_MSG_TYPES),
+        since=args.since,
+        limit=args.limit,
+    )
+    asyncio.run(
+        replay(messages, url=args.url, token=token, concurrency=args.concurrency)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -26,9 +26,11 @@ from .ai_api.gemini import Part as GeminiRequestPart
 from .ai_api.gemini import generate_content
 from .dependencies import (
     get_access_token,
+    get_journal,
     get_pending_queue,
     get_pending_queue_count,
     get_picture_cache,
+    is_replay_request,
 )
 from .middlewares import validate_github_signature, validate_wechat_signature
 from .schemas import WechatQrCodeEntity
@@ -93,9 +95,38 @@ class WeChat(HttpView):
         str | Literal[b""],
         PlainTextResponse[200],
     ]:
+        start_time = time.perf_counter()
         text = (await request.body).decode("utf-8")
-        xml = parse_xml(text)
-        logger.debug(f"Received message: {xml}\n{text}")
+
+        xml: dict[str, str] = {}
+        reply: str | Literal[b""] = b""
+        error: str | None = None
+        try:
+            xml = parse_xml(text)
+            logger.debug(f"Received message: {xml}\n{text}")
+            reply = await cls.handle_message(xml, picture_cache)
+            return reply
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            if (journal := get_journal()) is not None:
+                journal.record(
+                    "message",
+                    user_id=xml.get("FromUserName", ""),
+                    msg_id=xml.get("MsgId", ""),
+                    msg_type=xml.get("MsgType", ""),
+                    request=text,
+                    response=reply if isinstance(reply, str) else "",
+                    latency=time.perf_counter() - start_time,
+                    error=error,
+                    replay=is_replay_request(),
+                )
+
+    @classmethod
+    async def handle_message(
+        cls, xml: dict[str, str], picture_cache: dict[str, list[str]]
+    ) -> str | Literal[b""]:
         msg_type = xml["MsgType"]
 
         match msg_type:
@@ -156,7 +187,9 @@ class WeChat(HttpView):
         content = xml["Content"]
         if content == "【收到不支持的消息类型，暂无法显示】":
             return cls.reply_text(user_id, "请不要发送表情包。")
-        return await cls.wait_generate_content(user_id, msg_id, content)
+        return await cls.wait_generate_content(
+            user_id, msg_id, content, msg_type=xml["MsgType"]
+        )
 
     @classmethod
     async def handle_voice(cls, xml: dict[str, str]) -> str:
@@ -170,7 +203,9 @@ class WeChat(HttpView):
             return cls.reply_text(user_id, "微信无法识别这条语音内容，请重新发送。")
         msg_id = xml["MsgId"]
         content = xml["Recognition"]
-        return await cls.wait_generate_content(user_id, msg_id, content)
+        return await cls.wait_generate_content(
+            user_id, msg_id, content, msg_type=xml["MsgType"]
+        )
 
     @staticmethod
     def reply_text(user_id: str, content: str) -> str:
@@ -189,7 +224,7 @@ class WeChat(HttpView):
 
     @classmethod
     async def wait_generate_content(
-        cls, user_id: str, msg_id: str, content: str
+        cls, user_id: str, msg_id: str, content: str, *, msg_type: str = "text"
     ) -> str:
         pending_queue = get_pending_queue()
         pending_queue_count = get_pending_queue_count()
@@ -203,7 +238,9 @@ class WeChat(HttpView):
         else:
             pending_queue_count[msg_id] = 1
             pending_queue[msg_id] = asyncio.create_task(
-                cls.generate_content(user_id, content)
+                cls.generate_content(
+                    user_id, content, msg_id=msg_id, msg_type=msg_type
+                )
             )
             asyncio.get_running_loop().call_later(
                 20,
@@ -215,14 +252,32 @@ class WeChat(HttpView):
             return await asyncio.shield(pending_queue[msg_id])
 
     @classmethod
-    async def generate_content(cls, user_id: str, message_text: str):
+    async def generate_content(
+        cls,
+        user_id: str,
+        message_text: str,
+        *,
+        msg_id: str = "",
+        msg_type: str = "text",
+    ):
+        start_time = time.perf_counter()
         parts: list[GeminiRequestPart] = [{"text": message_text}]
         photos: list[str] = get_picture_cache().pop(user_id, [])
         async with httpx.AsyncClient() as client:
             for photo_url in photos:
                 resp = await client.get(photo_url)
                 if not resp.is_success:
-                    return "微信图片服务器出现问题，请稍后再试。"
+                    response_content = "微信图片服务器出现问题，请稍后再试。"
+                    cls.record_generate(
+                        user_id,
+                        msg_id,
+                        msg_type,
+                        message_text,
+                        response_content,
+                        time.perf_counter() - start_time,
+                        f"Picture {photo_url} status code {resp.status_code}",
+                    )
+                    return response_content
                 image = resp.content
                 image_base64 = base64.b64encode(image).decode("utf-8")
                 parts.append(
@@ -234,19 +289,32 @@ class WeChat(HttpView):
                     }
                 )
         contents: list[GeminiRequestContent] = [{"parts": parts}]
+        generate_error: str | None = None
         try:
             response_content = await generate_content(
                 contents, safety_threshold="BLOCK_MEDIUM_AND_ABOVE"
             )
         except GenerateSafeError as error:
             response_content = "这是不可以谈的话题。"
+            generate_error = repr(error)
             logger.warning(f"Safe error: {error}")
         except GenerateResponseError as error:
             response_content = "我好像找不到我的大脑了。"
+            generate_error = repr(error)
             logger.exception(f"Response error: {error}")
         except GenerateNetworkError as error:
             response_content = "网络出现问题，请稍后再试。"
+            generate_error = repr(error)
             logger.warning(f"Network error: {error}")
+        cls.record_generate(
+            user_id,
+            msg_id,
+            msg_type,
+            message_text,
+            response_content,
+            time.perf_counter() - start_time,
+            generate_error,
+        )
 
         # <xml>
         # <ToUserName><![CDATA[toUser]]></ToUserName>
@@ -265,6 +333,29 @@ class WeChat(HttpView):
             }
         )
 
+    @staticmethod
+    def record_generate(
+        user_id: str,
+        msg_id: str,
+        msg_type: str,
+        message_text: str,
+        response_content: str,
+        latency: float,
+        error: str | None,
+    ) -> None:
+        if (journal := get_journal()) is not None:
+            journal.record(
+                "generate",
+                user_id=user_id,
+                msg_id=msg_id,
+                msg_type=msg_type,
+                request=message_text,
+                response=response_content,
+                latency=latency,
+                error=error,
+                replay=is_replay_request(),
+            )
+
 
 @routes.http("/github", middlewares=[validate_github_signature])
 class GitHub(HttpView):
@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     gemini_pro_url: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
     gemini_pro_vision_url: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro-vision:generateContent"
 
+    # Journal, set to empty string to disable
+    journal_path: str = "journal.sqlite3"
+    journal_max_queue_size: int = 10000
+
     # GitHub
     github_webhook_secret: str | None = None
 
@@ -1,6 +1,9 @@
+import hashlib
 from functools import wraps
 from typing import Any, Awaitable, Callable, Coroutine, ParamSpec, TypeVar
 
+from cool import F
+
 R = TypeVar("R")
 P = ParamSpec("P")
 
@@ -20,3 +23,11 @@ def retry_when_exception(*exceptions: type[BaseException], max_tries: int = 3):
         return wrapper
 
     return d
+
+
+def wechat_signature(token: str, timestamp: str, nonce: str) -> str:
+    """
+    https://developers.weixin.qq.com/doc/offiaccount/Basic_Information/Access_Overview.html
+    """
+    string = [token, timestamp, nonce] | F(sorted) | F("".join)
+    return string.encode("utf-8") | F(lambda x: hashlib.sha1(x).hexdigest())